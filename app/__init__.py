@@ -3,42 +3,143 @@
 IAM Application Factory
 Version: v1.1.1
 """
-from flask import Flask
-from flask_cors import CORS
+from flask import Flask, g, request
+from flask.cli import AppGroup
 from app.config import DevConfig  # or ProdConfig in production
-from app.extensions import db, login_manager, migrate
-from app.auth.models import IAMUserAccount  # make sure models are imported so SQLAlchemy sees them
+from app.extensions import db, login_manager, migrate, cache
 
-# optional: import blueprints
-from app.auth.routes_login import auth_bp
-from app.auth.routes_admin import admin_bp
-from app.auth.routes_api import api_bp
+# CORS policy for the REST API (everything under /api/)
+CORS_PATH_PREFIX = "/api/"
+CORS_ALLOW_METHODS = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
+CORS_ALLOW_HEADERS = "Content-Type, Authorization"
+
+
+def _raise_on_lazy_load(state):
+    """do_orm_execute hook: add raiseload("*") to single-entity ORM selects."""
+    from flask import current_app
+    from sqlalchemy.orm import raiseload
+
+    # The listener sits on the process-wide Session class; only act for apps that opted in
+    if not current_app or not current_app.config.get("SQLALCHEMY_RAISELOAD"):
+        return
+    if not state.is_select or state.is_relationship_load or state.is_column_load:
+        return
+    descriptions = state.statement.column_descriptions
+    # Column/row queries have nothing to lazy-load
+    if len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]:
+        state.statement = state.statement.options(raiseload("*"))
+
+
+def _enable_raiseload():
+    """Make accidental lazy loads raise for apps with SQLALCHEMY_RAISELOAD set (TestConfig)."""
+    from sqlalchemy import event
+
+    if not event.contains(db.session, "do_orm_execute", _raise_on_lazy_load):
+        event.listen(db.session, "do_orm_execute", _raise_on_lazy_load)
+
+
+def _use_utc_session(dbapi_connection, connection_record):
+    """connect hook: run MySQL sessions in UTC so now()/CURRENT_TIMESTAMP match the app's UTC stamps."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("SET time_zone = '+00:00'")
+    cursor.close()
+
+
+class _LazyAppGroup(AppGroup):
+    """app.cli that pulls in app.cli's commands only when the flask CLI asks for one."""
+
+    _iam_loaded = False
+
+    def _load_iam_commands(self):
+        if not self._iam_loaded:
+            from app.cli import iam_commands
+            for command in iam_commands:
+                self.add_command(command)
+            self._iam_loaded = True
+
+    def get_command(self, ctx, name):
+        self._load_iam_commands()
+        return super().get_command(ctx, name)
+
+    def list_commands(self, ctx):
+        self._load_iam_commands()
+        return super().list_commands(ctx)
 
 
 def create_app(config_object=DevConfig):
+    # Heavy imports are deferred to app creation so importing the package stays cheap
+    from app.auth import models  # noqa: F401  make sure models are imported so SQLAlchemy sees them
+    from app.auth.routes_login import auth_bp
+    from app.auth.routes_admin import admin_bp
+    from app.auth.routes_api import api_bp
+    from app.auth.last_login import last_login_writer
+    from app.auth.audit_writer import audit_writer
+    from app.json_provider import OrjsonProvider
+
     app = Flask(__name__)
+    app.cli = _LazyAppGroup()  # before init_app/register_blueprint add their commands
     app.config.from_object(config_object)
+    app.json = OrjsonProvider(app)
 
     # 1. init extensions
     db.init_app(app)
     login_manager.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    last_login_writer.init_app(app)
+    audit_writer.init_app(app)
+
+    # Server-side timestamp defaults follow the session time zone; pin it to UTC
+    with app.app_context():
+        if db.engine.dialect.name == "mysql":
+            from sqlalchemy import event
+            event.listen(db.engine, "connect", _use_utc_session)
     
-    # Configure CORS for API access
-    CORS(app, resources={
-        r"/api/*": {
-            "origins": app.config.get('ALLOWED_ORIGINS', ['*']),
-            "methods": ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "supports_credentials": True
-        }
-    })
+    # Configure CORS for API access (plain prefix check, no per-request regex)
+    allowed_origins = frozenset(app.config.get('ALLOWED_ORIGINS', ['*']))
+
+    @app.before_request
+    def cors_preflight():
+        if request.method == "OPTIONS" and request.path.startswith(CORS_PATH_PREFIX):
+            return app.make_default_options_response()
+
+    @app.after_request
+    def cors_headers(response):
+        origin = request.headers.get("Origin")
+        if not origin or not request.path.startswith(CORS_PATH_PREFIX):
+            return response
+        if "*" in allowed_origins or origin in allowed_origins:
+            # Credentials are allowed, so echo the origin rather than "*"
+            response.headers["Access-Control-Allow-Origin"] = origin
+            response.headers["Access-Control-Allow-Credentials"] = "true"
+            response.vary.add("Origin")
+            if request.method == "OPTIONS":
+                response.headers["Access-Control-Allow-Methods"] = CORS_ALLOW_METHODS
+                response.headers["Access-Control-Allow-Headers"] = CORS_ALLOW_HEADERS
+        return response
+
+    if app.config.get("SQLALCHEMY_RAISELOAD"):
+        _enable_raiseload()
 
     # 2. configure login manager user loader
     @login_manager.user_loader
     def load_user(user_id):
         # Flask-Login calls this with user_id from session
-        return IAMUserAccount.query.get(int(user_id))
+        uid = int(user_id)
+        cached = g.get("_iam_user")
+        if cached is not None and cached.user_id == uid:
+            return cached  # already loaded during this request
+
+        from sqlalchemy.orm import selectinload
+        from app.auth.models import IAMUserAccount
+
+        # Roles are loaded with one IN-query instead of a JOIN on every request
+        user = db.session.get(
+            IAMUserAccount, uid,
+            options=[selectinload(IAMUserAccount.roles)]
+        )
+        g._iam_user = user
+        return user
 
     login_manager.login_view = "auth.login_page"   # endpoint name for @login_required redirects
 
@@ -51,8 +152,12 @@ def create_app(config_object=DevConfig):
     @app.route("/healthz")
     def healthcheck():
         try:
-            # Test database connectivity
-            db.session.execute(db.text("SELECT 1"))
+            # Test database connectivity with a driver-level ping (no Session, no SQL parse)
+            raw = db.engine.raw_connection()
+            try:
+                raw.driver_connection.ping()
+            finally:
+                raw.close()
             db_status = "connected"
         except Exception as e:
             db_status = f"error: {str(e)}"
@@ -63,92 +168,4 @@ def create_app(config_object=DevConfig):
             "database": db_status
         }, 200 if db_status == "connected" else 503
 
-    # 5. Register CLI commands
-    @app.cli.command("test-db")
-    def test_db():
-        """Test database connection."""
-        try:
-            result = db.session.execute(db.text("SELECT 1 as test"))
-            row = result.fetchone()
-            if row and row[0] == 1:
-                print("✅ Database connection successful!")
-                # Try to query tables
-                try:
-                    tables = db.session.execute(
-                        db.text("SHOW TABLES LIKE 'iam_%'")
-                    ).fetchall()
-                    if tables:
-                        print(f"✅ Found {len(tables)} IAM tables")
-                        for table in tables:
-                            print(f"   - {table[0]}")
-                    else:
-                        print("⚠️  No IAM tables found. Run 'flask db upgrade' to create them.")
-                except Exception as e:
-                    print(f"⚠️  Could not check tables: {e}")
-                return True
-        except Exception as e:
-            print(f"❌ Database connection failed: {e}")
-            print(f"\nConnection string: {app.config.get('SQLALCHEMY_DATABASE_URI', 'Not set')}")
-            print("\nTroubleshooting:")
-            print("1. Ensure MySQL is running: mysql.server start (or brew services start mysql)")
-            print("2. Check database exists: mysql -u root -e 'SHOW DATABASES'")
-            print("3. Create database if needed: mysql -u root < db/iam_schema.sql")
-            return False
-
-    @app.cli.command("create-test-user")
-    def create_test_user():
-        """Create a test user for development."""
-        from app.auth.models import IAMUserAccount, IAMRole
-        from sqlalchemy.exc import OperationalError
-        
-        try:
-            username = input("Username (default: testuser): ").strip() or "testuser"
-            password = input("Password (default: testpass123): ").strip() or "testpass123"
-            email = input(f"Email (default: {username}@example.com): ").strip() or f"{username}@example.com"
-            
-            # Check if user exists
-            if IAMUserAccount.query.filter_by(username=username).first():
-                print(f"❌ User '{username}' already exists!")
-                return
-            
-            # Create user
-            user = IAMUserAccount(
-                username=username,
-                email=email,
-                display_name=username.title(),
-                parent_id=1,  # Default tenant
-                auth_provider='local',
-                is_active=True,  # Explicitly set active
-                is_locked=False  # Explicitly set not locked
-            )
-            user.set_password(password)
-            
-            # Try to assign admin role if it exists
-            admin_role = IAMRole.query.filter_by(role_name='admin').first()
-            if admin_role:
-                user.roles.append(admin_role)
-            
-            db.session.add(user)
-            db.session.commit()
-            
-            print(f"✅ Created user: {username}")
-            print(f"   Email: {email}")
-            print(f"   Roles: {[r.role_name for r in user.roles]}")
-            print(f"\nYou can now login at: http://127.0.0.1:5000/auth/login")
-        except OperationalError as e:
-            print(f"❌ Database connection failed: {e}")
-            print("\nMySQL is not running. Please start MySQL first:")
-            print("   - Docker: docker-compose up -d mysql")
-            print("   - Homebrew: brew services start mysql")
-            print("   - Manual: mysql.server start")
-            print("\nThen create the database:")
-            print("   mysql -u root < db/iam_schema.sql")
-            raise
-
-    @app.cli.command("init-db")
-    def init_db():
-        """Initialize database tables."""
-        db.create_all()
-        print("Database tables created.")
-
     return app
@@ -0,0 +1,18 @@
+# app/auth/account_status.py
+"""
+Single place that interprets a user's is_active / is_locked flags.
+Works on IAMUserAccount instances and on column rows that select both fields,
+so every route derives account status the same way from data it already has.
+"""
+from typing import Tuple
+
+
+def account_status(record) -> Tuple[bool, bool]:
+    """Return (is_active, is_locked) as real bools."""
+    return bool(record.is_active), bool(record.is_locked)
+
+
+def is_account_usable(record) -> bool:
+    """True when the account is active and not locked."""
+    is_active, is_locked = account_status(record)
+    return is_active and not is_locked
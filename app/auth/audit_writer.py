@@ -0,0 +1,74 @@
+# app/auth/audit_writer.py
+"""
+Batched audit-log writes.
+
+Auth events are queued in memory and a daemon thread inserts them as one
+multi-row INSERT every FLUSH_INTERVAL seconds (or as soon as BATCH_SIZE rows
+are waiting), so request handlers no longer commit per event. Thread start
+and shutdown come from BackgroundWriter.
+"""
+import queue
+import threading
+import time
+from app.extensions import db
+from app.auth.background_writer import BackgroundWriter
+
+FLUSH_INTERVAL = 0.5  # seconds
+BATCH_SIZE = 500
+MAX_QUEUED = 10000    # events beyond this are dropped rather than blocking requests
+
+
+class AuditLogWriter(BackgroundWriter):
+    thread_name = "iam-audit-writer"
+    extension_name = "iam_audit_writer"
+
+    def __init__(self):
+        super().__init__()
+        self._queue = queue.Queue(maxsize=MAX_QUEUED)
+
+    def submit(self, row: dict):
+        """Queue one iam_auth_log row. Raises queue.Full when the backlog is full."""
+        self._ensure_started()
+        self._queue.put_nowait(row)
+
+    def flush(self):
+        """Write everything currently queued."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(batch)
+
+    def _run(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                batch = [self._queue.get(timeout=FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + FLUSH_INTERVAL
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        if not batch or self._app is None:
+            return
+        from app.auth.models import IAMAuthLog
+        with self._app.app_context():
+            try:
+                db.session.execute(db.insert(IAMAuthLog), batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._app.logger.error(f"Failed to write {len(batch)} audit log rows: {e}")
+
+
+audit_writer = AuditLogWriter()
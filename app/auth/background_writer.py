@@ -0,0 +1,59 @@
+# app/auth/background_writer.py
+"""
+Shared plumbing for the batched background writers (audit log, last_login_at).
+
+A writer starts one daemon thread on first use. At interpreter exit
+shutdown() sets the thread's stop Event, joins it so it can finish the batch
+it is holding, and then flush()es whatever is still pending.
+"""
+import atexit
+import threading
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    """Naive UTC now, the same clock as now() on the UTC-pinned MySQL session."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class BackgroundWriter:
+    thread_name = "iam-writer"
+    extension_name = None
+
+    def __init__(self):
+        self._app = None
+        self._thread_lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions[self.extension_name] = self
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._stop = threading.Event()
+                    self._thread = threading.Thread(target=self._run, args=(self._stop,), name=self.thread_name, daemon=True)
+                    self._thread.start()
+                    atexit.register(self.shutdown)
+
+    def shutdown(self, timeout: float = None):
+        """Stop the writer thread, let it finish its current batch, then write the rest."""
+        with self._thread_lock:
+            thread, stop = self._thread, self._stop
+            self._thread = self._stop = None
+        if thread is not None:
+            atexit.unregister(self.shutdown)
+            stop.set()
+            thread.join(timeout)
+        self.flush()
+
+    def flush(self):
+        """Write everything pending right now."""
+        raise NotImplementedError
+
+    def _run(self, stop: threading.Event):
+        """Thread body; return once stop is set."""
+        raise NotImplementedError
@@ -0,0 +1,66 @@
+# app/auth/last_login.py
+"""
+Deferred last_login_at updates.
+
+Logins only record (user_id, time) in memory; a daemon thread coalesces them
+and writes one batched UPDATE every FLUSH_INTERVAL seconds, so the login
+request no longer waits on an UPDATE + COMMIT. Thread start and shutdown come
+from BackgroundWriter.
+"""
+import threading
+from datetime import datetime
+from app.extensions import db
+from app.auth.background_writer import BackgroundWriter, utc_now
+
+FLUSH_INTERVAL = 5.0  # seconds
+
+
+class LastLoginWriter(BackgroundWriter):
+    thread_name = "iam-last-login"
+    extension_name = "iam_last_login"
+
+    def __init__(self):
+        super().__init__()
+        self._pending = {}  # user_id -> latest login time
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int, when: datetime = None):
+        """Queue a last_login_at update; the newest time per user wins."""
+        with self._lock:
+            self._pending[user_id] = when or utc_now()
+        self._ensure_started()
+
+    def flush(self):
+        """Write all pending updates in one executemany UPDATE."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending or self._app is None:
+            return
+
+        from app.auth.models import IAMUserAccount
+        table = IAMUserAccount.__table__
+        stmt = (
+            table.update()
+            .where(table.c.user_id == db.bindparam("b_user_id"))
+            # Never move last_login_at backwards if batches overlap
+            .where(db.or_(table.c.last_login_at.is_(None), table.c.last_login_at < db.bindparam("b_login_at")))
+            .values(last_login_at=db.bindparam("b_login_at"))
+        )
+        with self._app.app_context():
+            try:
+                db.session.execute(stmt, [
+                    {"b_user_id": user_id, "b_login_at": login_at}
+                    for user_id, login_at in pending.items()
+                ])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._app.logger.error(f"Failed to write last_login_at for {len(pending)} users: {e}")
+
+    def _run(self, stop: threading.Event):
+        # wait() returns True as soon as shutdown() sets stop
+        while not stop.wait(FLUSH_INTERVAL):
+            self.flush()
+
+
+last_login_writer = LastLoginWriter()
@@ -2,11 +2,59 @@
 
 __version__ = "1.1.0"
 
-from datetime import datetime
-from typing import List
+import hashlib
+import hmac
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-from app.extensions import db
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import TypeDecorator
+from app.extensions import db, cache
+
+if TYPE_CHECKING:
+    from typing import List
+
+
+@lru_cache(maxsize=1)
+def _password_hasher():
+    # argon2-cffi is imported on first use to keep module import cheap
+    from argon2 import PasswordHasher
+    return PasswordHasher(time_cost=3, memory_cost=65536, parallelism=2)
+
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash():
+    # Verified against on the unknown-user login path so it costs the same as a real check
+    return _password_hasher().hash("iam-unknown-user")
+
+
+PASSWORD_OK_TTL = 30  # seconds a successful password check is remembered
+
+
+class BitBoolean(TypeDecorator):
+    """
+    Boolean stored as MySQL BIT(1).
+    MySQL drivers hand BIT values back as bytes (b'\\x00' is truthy), so coerce
+    them to real bools once on load instead of casting in every query.
+    """
+    impl = db.Boolean
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(mysql.BIT(1))
+        return dialect.type_descriptor(db.Boolean())
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else bool(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray)):
+            return int.from_bytes(value, "big") != 0
+        return bool(value)
 
 
 class IAMUserAccount(UserMixin, db.Model):
@@ -34,51 +82,63 @@ class IAMUserAccount(UserMixin, db.Model):
 
     password_hash   = db.Column(db.String(255))  # may be NULL for SSO users
 
-    is_active       = db.Column(db.Boolean, nullable=False, default=True)
-    is_locked       = db.Column(db.Boolean, nullable=False, default=False)
+    is_active       = db.Column(BitBoolean, nullable=False, default=True)  # also the Flask-Login hook
+    is_locked       = db.Column(BitBoolean, nullable=False, default=False)
 
     last_login_at   = db.Column(db.DateTime)
 
-    created_at      = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    updated_at      = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at      = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    updated_at      = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), onupdate=db.func.now())
 
     created_by      = db.Column(db.String(255))
     updated_by      = db.Column(db.String(255))
 
+    __table_args__  = (
+        db.Index("ix_user_created_at", created_at.desc(), user_id.desc()),  # user list ORDER BY / keyset cursor
+    )
+
     # relationships
+    # The per-user collections below are never loaded through the attribute
+    # (reading one raises); query IAMMfaMethod / IAMAuthSession / ... by
+    # user_id explicitly instead.
+    # Deletes are left to the FK ON DELETE rules in the schema.
     roles           = db.relationship(
         "IAMRole",
         secondary="iam_user_role",
         back_populates="users",
-        lazy="joined"
+        lazy="select"
     )
 
     mfa_methods     = db.relationship(
         "IAMMfaMethod",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="dynamic"
+        passive_deletes=True,
+        lazy="raise"
     )
 
     sessions        = db.relationship(
         "IAMAuthSession",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="dynamic"
+        passive_deletes=True,
+        lazy="raise"
     )
 
     mfa_challenges  = db.relationship(
         "IAMMfaChallenge",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="dynamic"
+        passive_deletes=True,
+        lazy="raise"
     )
 
     auth_logs       = db.relationship(
         "IAMAuthLog",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="dynamic"
+        passive_deletes=True,
+        lazy="raise"
     )
 
     # Flask-Login integration
@@ -95,49 +155,106 @@ class IAMUserAccount(UserMixin, db.Model):
 
     @property
     def is_active_account(self):
-        # Flask-Login uses is_active(), not is_active_account as property,
-        # but we keep both to avoid confusion with column is_active.
-        # Since the method name conflicts with the column, query the database directly
-        from app.extensions import db
-        try:
-            result = db.session.execute(
-                db.text("SELECT CAST(is_active AS UNSIGNED) as is_active, CAST(is_locked AS UNSIGNED) as is_locked FROM iam_user_account WHERE user_id = :user_id"),
-                {"user_id": self.user_id}
-            ).fetchone()
-            if result:
-                # CAST as UNSIGNED converts BIT(1) to int (0 or 1)
-                active_val = bool(result[0]) if result[0] is not None else True
-                locked_val = bool(result[1]) if result[1] is not None else False
-                return bool(active_val and not locked_val)
-            else:
-                return True  # Default to active if user not found
-        except Exception as e:
-            # If query fails, default to active
-            return True
-
-    def is_active(self):  # Flask-Login hook
-        return self.is_active_account
+        # Active and not locked; both columns are already loaded on the row.
+        from app.auth.account_status import is_account_usable
+        return is_account_usable(self)
 
     # Password helpers (local auth only)
     def set_password(self, raw_password: str):
-        self.password_hash = generate_password_hash(raw_password)
+        self.password_hash = _password_hasher().hash(raw_password)
 
     def verify_password(self, raw_password: str) -> bool:
         if not self.password_hash:
             return False
-        return check_password_hash(self.password_hash, raw_password)
+        if not self.password_hash.startswith("$argon2"):
+            # Legacy Werkzeug hash (pbkdf2:/scrypt:): verify, then upgrade to argon2.
+            # The caller's commit persists the new hash.
+            from werkzeug.security import check_password_hash
+            if not check_password_hash(self.password_hash, raw_password):
+                return False
+            self.set_password(raw_password)
+            return True
+
+        from argon2.exceptions import InvalidHash, VerificationError
+        hasher = _password_hasher()
+        try:
+            hasher.verify(self.password_hash, raw_password)
+        except (InvalidHash, VerificationError):
+            return False
+        if hasher.check_needs_rehash(self.password_hash):
+            self.set_password(raw_password)
+        return True
+
+    def verify_password_cached(self, raw_password: str) -> bool:
+        """
+        verify_password, remembering a success for PASSWORD_OK_TTL seconds so
+        repeated logins from the same client skip the argon2 work.
+        """
+        if not self.password_hash or not raw_password:
+            return self.verify_password(raw_password)
+        if cache.get(self._password_ok_key(raw_password)):
+            return True
+        if not self.verify_password(raw_password):
+            return False
+        # Keyed on the (possibly just upgraded) hash, so a password change invalidates it
+        cache.set(self._password_ok_key(raw_password), True, timeout=PASSWORD_OK_TTL)
+        return True
+
+    def _password_ok_key(self, raw_password: str) -> str:
+        from flask import current_app
+        digest = hmac.new(
+            current_app.secret_key.encode(),
+            f"{self.user_id}:{self.password_hash}:{raw_password}".encode(),
+            hashlib.sha256
+        ).hexdigest()
+        return f"iam:pwok:{digest}"
+
+    @staticmethod
+    def verify_dummy_password(raw_password: str) -> None:
+        """Burn one password check for a user that doesn't exist (timing parity)."""
+        from argon2.exceptions import VerificationError
+        try:
+            _password_hasher().verify(_dummy_password_hash(), raw_password or "")
+        except VerificationError:
+            pass
 
     # RBAC helpers
+    @cached_property
+    def _role_names(self) -> frozenset:
+        # Cleared by the roles/refresh listeners below whenever roles can change
+        return frozenset(r.role_name for r in self.roles)
+
     def has_role(self, role_name: str) -> bool:
-        return any(r.role_name == role_name for r in self.roles)
+        return role_name in self._role_names
 
-    def has_any_role(self, role_names: List[str]) -> bool:
-        names = {r.role_name for r in self.roles}
-        return any(r in names for r in role_names)
+    def has_any_role(self, role_names: "List[str]") -> bool:
+        return not self._role_names.isdisjoint(role_names)
 
     # MFA helpers
     def has_active_mfa(self) -> bool:
-        return self.mfa_methods.filter_by(is_active=True).count() > 0
+        # EXISTS stops at the first matching row; COUNT(*) would scan them all
+        return db.session.query(
+            db.exists().where(
+                IAMMfaMethod.user_id == self.user_id,
+                IAMMfaMethod.is_active.is_(True)
+            )
+        ).scalar()
+
+
+@event.listens_for(IAMUserAccount.roles, "append")
+@event.listens_for(IAMUserAccount.roles, "remove")
+def _reset_role_names(target, value, initiator):
+    target.__dict__.pop("_role_names", None)
+
+
+@event.listens_for(IAMUserAccount, "expire")
+def _reset_role_names_on_expire(target, attrs):
+    target.__dict__.pop("_role_names", None)
+
+
+@event.listens_for(IAMUserAccount, "refresh")
+def _reset_role_names_on_refresh(target, context, attrs):
+    target.__dict__.pop("_role_names", None)
 
 
 class IAMRole(db.Model):
@@ -151,8 +268,8 @@ class IAMRole(db.Model):
     role_name        = db.Column(db.String(100), unique=True, nullable=False)
     role_description = db.Column(db.String(255))
 
-    created_at       = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    updated_at       = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at       = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    updated_at       = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), onupdate=db.func.now())
 
     users            = db.relationship(
         "IAMUserAccount",
@@ -168,11 +285,14 @@ class IAMUserRole(db.Model):
     Mirrors iam_user_role.
     """
     __tablename__ = "iam_user_role"
+    __table_args__ = (
+        db.Index("ix_iam_user_role_role_id", "role_id"),
+    )
 
     user_id     = db.Column(db.Integer, db.ForeignKey("iam_user_account.user_id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True)
     role_id     = db.Column(db.Integer, db.ForeignKey("iam_role.role_id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True)
 
-    assigned_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    assigned_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
     assigned_by = db.Column(db.String(255))
 
 
@@ -186,14 +306,18 @@ class IAMAuthSession(db.Model):
     session_id          = db.Column(db.String(64), primary_key=True)
     user_id             = db.Column(db.Integer, db.ForeignKey("iam_user_account.user_id", ondelete="CASCADE", onupdate="CASCADE"), nullable=False)
 
-    login_time          = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    login_time          = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
     logout_time         = db.Column(db.DateTime)
 
     ip_address          = db.Column(db.String(64))
     user_agent          = db.Column(db.String(255))
     sso_idp_session_ref = db.Column(db.String(255))
 
-    created_at          = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at          = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+
+    __table_args__      = (
+        db.Index("ix_session_active_login", logout_time, login_time.desc()),  # active sessions list
+    )
 
     user                = db.relationship("IAMUserAccount", back_populates="sessions")
 
@@ -214,11 +338,16 @@ class IAMMfaMethod(db.Model):
     )
 
     totp_secret     = db.Column(db.String(255))  # should be encrypted at rest
-    is_primary      = db.Column(db.Boolean, nullable=False, default=False)
-    is_active       = db.Column(db.Boolean, nullable=False, default=True)
+    is_primary      = db.Column(BitBoolean, nullable=False, default=False)
+    is_active       = db.Column(BitBoolean, nullable=False, default=True)
+
+    created_at      = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+    updated_at      = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), onupdate=db.func.now())
 
-    created_at      = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    updated_at      = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    __table_args__  = (
+        db.Index("ix_mfa_active_created", is_active, created_at.desc()),  # mfa_list filter + ORDER BY
+        db.Index("ix_mfa_user_active", user_id, is_active),  # has_active_mfa EXISTS probe
+    )
 
     user            = db.relationship("IAMUserAccount", back_populates="mfa_methods")
 
@@ -240,7 +369,7 @@ class IAMMfaChallenge(db.Model):
 
     otp_code_hash   = db.Column(db.String(255))  # store hashed OTP / code (never plaintext)
 
-    issued_at       = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    issued_at       = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
     expires_at      = db.Column(db.DateTime, nullable=False)
     consumed_at     = db.Column(db.DateTime)
 
@@ -271,11 +400,16 @@ class IAMAuthLog(db.Model):
         nullable=False
     )
 
-    event_time      = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    event_time      = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
 
     ip_address      = db.Column(db.String(64))
     user_agent      = db.Column(db.String(255))
 
     details         = db.Column(db.Text)
 
+    __table_args__  = (
+        db.Index("ix_auth_log_event_time_log_id", event_time.desc(), log_id.desc()),  # recent events / keyset cursor
+        db.Index("ix_auth_log_user_id", user_id),
+    )
+
     user            = db.relationship("IAMUserAccount", back_populates="auth_logs")
@@ -1,17 +1,48 @@
 # app/auth/routes_admin.py
+from datetime import datetime
+from functools import lru_cache
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
-from app.extensions import db
+from sqlalchemy.orm import joinedload
+from app.extensions import db, cache
 from app.auth.models import IAMUserAccount, IAMRole, IAMUserRole, IAMMfaMethod, IAMAuthSession, IAMAuthLog
 
 admin_bp = Blueprint("admin", __name__, template_folder="templates")
 
+AUDIT_PAGE_SIZE = 100
+ACTIVE_SESSIONS_LIMIT = 100  # most recent active sessions shown on the audit page
+PAGE_CACHE_TIMEOUT = 30  # seconds
+
+
+def _user_page_cache_key():
+    # Pages embed the signed-in user's details, so cache them per user
+    return f"admin:{request.endpoint}:{current_user.user_id}"
+
+
+def _cacheable(response):
+    # Don't cache the error-path redirects
+    return getattr(response, "status_code", 200) == 200
+
+
+@lru_cache(maxsize=4096)
+def _strftime(value: datetime, fmt: str) -> str:
+    return value.strftime(fmt)
+
+
+@admin_bp.app_template_filter("dt")
+def format_datetime(value, fmt="%Y-%m-%d %H:%M", default=""):
+    """Jinja filter: {{ value|dt(fmt, default) }}; repeated timestamps are formatted once."""
+    if value is None:
+        return default
+    return _strftime(value, fmt)
+
 
 @admin_bp.get("/dashboard")
 @login_required
+@cache.cached(timeout=PAGE_CACHE_TIMEOUT, key_prefix=_user_page_cache_key, response_filter=_cacheable)
 def dashboard():
     """Basic admin dashboard - placeholder for now."""
-    return render_template("admin/dashboard.html", user=current_user)
+    return render_template("admin/dashboard.html", current_user=current_user._get_current_object())
 
 
 @admin_bp.get("/users")
@@ -19,8 +50,29 @@ def dashboard():
 def users_list():
     """List all users."""
     try:
-        users = IAMUserAccount.query.order_by(IAMUserAccount.created_at.desc()).all()
-        return render_template("admin/users.html", users=users, user=current_user, current_user=current_user)
+        # Plain rows with only the rendered columns; no ORM instances to hydrate
+        users = db.session.execute(
+            db.select(
+                IAMUserAccount.user_id,
+                IAMUserAccount.username,
+                IAMUserAccount.email,
+                IAMUserAccount.display_name,
+                IAMUserAccount.auth_provider,
+                IAMUserAccount.is_active,
+                IAMUserAccount.is_locked,
+                IAMUserAccount.last_login_at,
+                IAMUserAccount.created_at,
+            ).order_by(IAMUserAccount.created_at.desc())
+        ).all()
+        # Role names for every user in one extra query
+        user_roles = {}
+        for user_id, role_name in db.session.execute(
+            db.select(IAMUserRole.user_id, IAMRole.role_name)
+            .join(IAMRole, IAMRole.role_id == IAMUserRole.role_id)
+            .order_by(IAMRole.role_name)
+        ):
+            user_roles.setdefault(user_id, []).append(role_name)
+        return render_template("admin/users.html", users=users, user_roles=user_roles, current_user=current_user._get_current_object())
     except Exception as e:
         current_app.logger.error(f"Error in users_list: {e}", exc_info=True)
         flash(f"Error loading users: {str(e)}", "error")
@@ -29,15 +81,19 @@ def users_list():
 
 @admin_bp.get("/roles")
 @login_required
+@cache.cached(timeout=PAGE_CACHE_TIMEOUT, key_prefix=_user_page_cache_key, response_filter=_cacheable)
 def roles_list():
     """List all roles and their assignments."""
     try:
         roles = IAMRole.query.order_by(IAMRole.role_name).all()
-        # Count users per role
-        role_counts = {}
+        # Count users per role in a single GROUP BY instead of one COUNT per role
+        role_counts = dict(db.session.execute(
+            db.select(IAMUserRole.role_id, db.func.count())
+            .group_by(IAMUserRole.role_id)
+        ).all())
         for role in roles:
-            role_counts[role.role_id] = IAMUserRole.query.filter_by(role_id=role.role_id).count()
-        return render_template("admin/roles.html", roles=roles, role_counts=role_counts, user=current_user, current_user=current_user)
+            role_counts.setdefault(role.role_id, 0)
+        return render_template("admin/roles.html", roles=roles, role_counts=role_counts, current_user=current_user._get_current_object())
     except Exception as e:
         current_app.logger.error(f"Error in roles_list: {e}", exc_info=True)
         flash(f"Error loading roles: {str(e)}", "error")
@@ -50,7 +106,12 @@ def mfa_list():
     """List all MFA enrollments."""
     try:
         # Get all users with MFA methods
-        mfa_methods = IAMMfaMethod.query.filter_by(is_active=True).order_by(IAMMfaMethod.created_at.desc()).all()
+        mfa_methods = db.session.scalars(
+            db.select(IAMMfaMethod)
+            .options(joinedload(IAMMfaMethod.user))
+            .where(IAMMfaMethod.is_active.is_(True))
+            .order_by(IAMMfaMethod.created_at.desc())
+        ).unique().all()
         # Group by user
         users_with_mfa = {}
         for method in mfa_methods:
@@ -60,7 +121,7 @@ def mfa_list():
                     'methods': []
                 }
             users_with_mfa[method.user_id]['methods'].append(method)
-        return render_template("admin/mfa.html", users_with_mfa=users_with_mfa, user=current_user, current_user=current_user)
+        return render_template("admin/mfa.html", users_with_mfa=users_with_mfa, current_user=current_user._get_current_object())
     except Exception as e:
         current_app.logger.error(f"Error in mfa_list: {e}", exc_info=True)
         flash(f"Error loading MFA data: {str(e)}", "error")
@@ -72,11 +133,49 @@ def mfa_list():
 def audit_logs():
     """List audit logs and sessions."""
     try:
-        # Get recent audit logs
-        logs = IAMAuthLog.query.order_by(IAMAuthLog.event_time.desc()).limit(100).all()
-        # Get active sessions
-        active_sessions = IAMAuthSession.query.filter_by(logout_time=None).order_by(IAMAuthSession.login_time.desc()).all()
-        return render_template("admin/audit_logs.html", logs=logs, active_sessions=active_sessions, user=current_user, current_user=current_user)
+        # Keyset pagination: ?cursor=<event_time iso>&cursor_id=<log_id> of the last row seen
+        try:
+            cursor = datetime.fromisoformat(request.args["cursor"])
+            cursor_id = request.args.get("cursor_id", type=int)
+        except (KeyError, ValueError):
+            cursor, cursor_id = None, None
+
+        # Get recent audit logs, one page at a time
+        logs_query = (
+            db.select(
+                IAMAuthLog.log_id,
+                IAMAuthLog.event_time,
+                IAMAuthLog.event_type,
+                IAMAuthLog.ip_address,
+                IAMAuthLog.details,
+                IAMUserAccount.username,
+            )
+            .outerjoin(IAMUserAccount, IAMUserAccount.user_id == IAMAuthLog.user_id)
+            .order_by(IAMAuthLog.event_time.desc(), IAMAuthLog.log_id.desc())
+            .limit(AUDIT_PAGE_SIZE)
+        )
+        if cursor is not None and cursor_id is not None:
+            logs_query = logs_query.where(
+                db.tuple_(IAMAuthLog.event_time, IAMAuthLog.log_id) < (cursor, cursor_id)
+            )
+        elif cursor is not None:
+            logs_query = logs_query.where(IAMAuthLog.event_time < cursor)
+        logs = db.session.execute(logs_query).all()
+        next_cursor = logs[-1] if len(logs) == AUDIT_PAGE_SIZE else None
+
+        # Get the most recent active sessions (bounded like the log page)
+        active_sessions = db.session.execute(
+            db.select(
+                IAMAuthSession.login_time,
+                IAMAuthSession.ip_address,
+                IAMUserAccount.username,
+            )
+            .outerjoin(IAMUserAccount, IAMUserAccount.user_id == IAMAuthSession.user_id)
+            .where(IAMAuthSession.logout_time.is_(None))
+            .order_by(IAMAuthSession.login_time.desc())
+            .limit(ACTIVE_SESSIONS_LIMIT)
+        ).all()
+        return render_template("admin/audit_logs.html", logs=logs, next_cursor=next_cursor, active_sessions=active_sessions, active_sessions_limit=ACTIVE_SESSIONS_LIMIT, current_user=current_user._get_current_object())
     except Exception as e:
         current_app.logger.error(f"Error in audit_logs: {e}", exc_info=True)
         flash(f"Error loading audit logs: {str(e)}", "error")
@@ -1,26 +1,96 @@
 # app/auth/routes_api.py
-from flask import Blueprint, request, jsonify
+import base64
+import time
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
 from flask_login import login_user, logout_user, login_required, current_user
-from app.extensions import db
-from app.auth.models import IAMUserAccount, IAMRole, IAMAuthLog, IAMAuthSession
+from app.extensions import db, cache, login_manager
+from app.auth.models import IAMUserAccount, IAMRole, IAMUserRole, IAMAuthLog, IAMAuthSession
+from app.auth.last_login import last_login_writer
+from app.auth.audit_writer import audit_writer
+from app.auth.background_writer import utc_now
+from app.auth.account_status import account_status
+from app.json_provider import dumps_bytes
 from datetime import datetime
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
+USER_PAYLOAD_TTL = 60  # seconds a cached /auth/verify payload stays valid
+USER_SNAPSHOT_KEY = "iam_user_snapshot"  # session key holding the payload for /auth/verify
+
+
+def _user_payload(user) -> dict:
+    """User info returned by login and verify."""
+    return {
+        "user_id": user.user_id,
+        "username": user.username,
+        "email": user.email,
+        "display_name": user.display_name,
+        "roles": [role.role_name for role in user.roles],
+        "auth_provider": user.auth_provider
+    }
+
+
+def _user_payload_key(user_id: int) -> str:
+    return f"iam:user:{user_id}"
+
+
+def _store_user_snapshot(user_payload: dict):
+    """Keep the verify payload in the (signed) session cookie."""
+    session[USER_SNAPSHOT_KEY] = {"user": user_payload, "issued_at": time.time()}
+
+
+def _user_snapshot():
+    """The session's user payload, or None if missing, stale or not for the logged-in user."""
+    snapshot = session.get(USER_SNAPSHOT_KEY)
+    if not snapshot:
+        return None
+    # Flask-Login keeps the logged-in id under "_user_id"; a mismatch means a different login
+    if str(snapshot["user"]["user_id"]) != session.get("_user_id"):
+        return None
+    # Same staleness bound as the server-side payload cache
+    if time.time() - snapshot["issued_at"] > USER_PAYLOAD_TTL:
+        return None
+    return snapshot["user"]
+
+
+def _encode_user_cursor(user) -> str:
+    """Opaque keyset cursor for the (created_at, user_id) position of a user."""
+    raw = f"{user.created_at.isoformat()}|{user.user_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_user_cursor(cursor: str):
+    """Inverse of _encode_user_cursor. Raises ValueError on malformed input."""
+    created_at, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), int(user_id)
+
+
+def _roles_by_user(user_ids) -> dict:
+    """Role names for a set of users in one query: {user_id: [role_name, ...]}."""
+    roles = {}
+    if user_ids:
+        for user_id, role_name in db.session.execute(
+            db.select(IAMUserRole.user_id, IAMRole.role_name)
+            .join(IAMRole, IAMRole.role_id == IAMUserRole.role_id)
+            .where(IAMUserRole.user_id.in_(user_ids))
+        ):
+            roles.setdefault(user_id, []).append(role_name)
+    return roles
+
 
 def log_auth_event(event_type: str, user_id: int = None, success: bool = True, details: str = None):
-    """Helper to log authentication events."""
+    """Helper to log authentication events (written in batches by audit_writer)."""
     try:
-        log = IAMAuthLog(
-            user_id=user_id,
-            event_type=event_type,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent'),
-            details=details or f"Event: {event_type}, Success: {success}"
-        )
-        db.session.add(log)
-        db.session.commit()
+        audit_writer.submit({
+            "user_id": user_id,
+            "event_type": event_type,
+            "event_time": utc_now(),  # when it happened, not when the batch lands
+            "ip_address": request.remote_addr,
+            "user_agent": request.headers.get('User-Agent'),
+            "details": details or f"Event: {event_type}, Success: {success}"
+        })
     except Exception as e:
         # Don't fail the request if logging fails
         pass
@@ -40,51 +110,38 @@ def api_login():
         if not username or not password:
             return jsonify({"status": "error", "message": "Username and password required"}), 400
         
-        user = IAMUserAccount.query.filter_by(username=username).first()
+        user = IAMUserAccount.query.options(selectinload(IAMUserAccount.roles)).filter_by(username=username).first()
         
         if not user:
+            # Same hashing cost as a real check so response time doesn't reveal unknown usernames
+            IAMUserAccount.verify_dummy_password(password)
             log_auth_event("login_failed", success=False, details=f"User not found: {username}")
             return jsonify({"status": "error", "message": "Invalid credentials"}), 401
         
-        if not user.verify_password(password):
+        if not user.verify_password_cached(password):
             log_auth_event("login_failed", user_id=user.user_id, success=False, details="Invalid password")
             return jsonify({"status": "error", "message": "Invalid credentials"}), 401
         
-        # Check account status - use direct query to avoid method shadowing
-        result = db.session.execute(
-            db.text("SELECT CAST(is_active AS UNSIGNED) as is_active, CAST(is_locked AS UNSIGNED) as is_locked FROM iam_user_account WHERE user_id = :user_id"),
-            {"user_id": user.user_id}
-        ).fetchone()
-        
-        if result:
-            is_active_val = bool(result[0]) if result[0] is not None else True
-            is_locked_val = bool(result[1]) if result[1] is not None else False
-            account_active = is_active_val and not is_locked_val
-        else:
-            account_active = True
-        
-        if not account_active:
+        # Check account status (columns already loaded with the user row)
+        if not user.is_active_account:
             log_auth_event("login_failed", user_id=user.user_id, success=False, details="Account locked/inactive")
             return jsonify({"status": "error", "message": "Account disabled or locked"}), 403
         
         # Login successful
         login_user(user, remember=True)
-        user.last_login_at = datetime.utcnow()
-        db.session.commit()
+        last_login_writer.record(user.user_id)  # written in the background
+        if db.session.dirty:
+            db.session.commit()  # e.g. password hash upgraded by verify_password
         
         log_auth_event("login_success", user_id=user.user_id, success=True)
         
-        # Return user info
+        # Return user info, and prime the cache /auth/verify reads from
+        user_payload = _user_payload(user)
+        cache.set(_user_payload_key(user.user_id), user_payload, timeout=USER_PAYLOAD_TTL)
+        _store_user_snapshot(user_payload)
         return jsonify({
             "status": "success",
-            "user": {
-                "user_id": user.user_id,
-                "username": user.username,
-                "email": user.email,
-                "display_name": user.display_name,
-                "roles": [role.role_name for role in user.roles],
-                "auth_provider": user.auth_provider
-            }
+            "user": user_payload
         }), 200
         
     except Exception as e:
@@ -92,20 +149,26 @@ def api_login():
 
 
 @api_bp.get("/auth/verify")
-@login_required
 def api_verify():
-    """REST API verify session endpoint."""
+    """REST API verify session endpoint.
+
+    A fresh snapshot in the session cookie answers without loading the user;
+    otherwise this falls back to the usual login_required path.
+    """
     try:
+        user_payload = _user_snapshot()
+        if user_payload is None:
+            if not current_user.is_authenticated:
+                return login_manager.unauthorized()
+            cache_key = _user_payload_key(current_user.user_id)
+            user_payload = cache.get(cache_key)
+            if user_payload is None:
+                user_payload = _user_payload(current_user)
+                cache.set(cache_key, user_payload, timeout=USER_PAYLOAD_TTL)
+            _store_user_snapshot(user_payload)
         return jsonify({
             "authenticated": True,
-            "user": {
-                "user_id": current_user.user_id,
-                "username": current_user.username,
-                "email": current_user.email,
-                "display_name": current_user.display_name,
-                "roles": [role.role_name for role in current_user.roles],
-                "auth_provider": current_user.auth_provider
-            }
+            "user": user_payload
         }), 200
     except Exception as e:
         return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
@@ -118,6 +181,9 @@ def api_logout():
     try:
         user_id = current_user.user_id if current_user else None
         logout_user()
+        session.pop(USER_SNAPSHOT_KEY, None)
+        if user_id is not None:
+            cache.delete(_user_payload_key(user_id))
         log_auth_event("logout", user_id=user_id, success=True)
         return jsonify({"status": "success", "message": "Logged out"}), 200
     except Exception as e:
@@ -127,47 +193,82 @@ def api_logout():
 @api_bp.get("/users")
 @login_required
 def api_users_list():
-    """REST API list users endpoint."""
+    """REST API list users endpoint.
+
+    Keyset pagination: pass the previous response's ``next_cursor`` as
+    ``?cursor=``. ``?page=`` (OFFSET paging) is still accepted but deprecated.
+    """
     try:
         # Get pagination params
-        page = request.args.get('page', 1, type=int)
+        page = request.args.get('page', type=int)
+        cursor = request.args.get('cursor')
         per_page = request.args.get('per_page', 50, type=int)
         per_page = min(per_page, 100)  # Max 100 per page
         
-        # Query users
-        users_query = IAMUserAccount.query.order_by(IAMUserAccount.created_at.desc())
-        pagination = users_query.paginate(page=page, per_page=per_page, error_out=False)
+        # Query users: only the serialized columns, as plain rows
+        users_query = IAMUserAccount.query.with_entities(
+            IAMUserAccount.user_id,
+            IAMUserAccount.username,
+            IAMUserAccount.email,
+            IAMUserAccount.display_name,
+            IAMUserAccount.auth_provider,
+            IAMUserAccount.is_active,
+            IAMUserAccount.is_locked,
+            IAMUserAccount.last_login_at,
+            IAMUserAccount.created_at
+        ).order_by(
+            IAMUserAccount.created_at.desc(), IAMUserAccount.user_id.desc()
+        )
+        
+        if page is not None:
+            # Deprecated OFFSET pagination
+            pagination = users_query.paginate(page=page, per_page=per_page, error_out=False)
+            users = pagination.items
+            has_more = pagination.has_next
+            page_info = {
+                "total": pagination.total,
+                "page": page,
+                "pages": pagination.pages
+            }
+        else:
+            if cursor:
+                try:
+                    created_at, last_user_id = _decode_user_cursor(cursor)
+                except ValueError:
+                    return jsonify({"status": "error", "message": "Invalid cursor"}), 400
+                users_query = users_query.filter(
+                    db.tuple_(IAMUserAccount.created_at, IAMUserAccount.user_id) < (created_at, last_user_id)
+                )
+            # Fetch one extra row to learn whether another page exists
+            users = users_query.limit(per_page + 1).all()
+            has_more = len(users) > per_page
+            users = users[:per_page]
+            page_info = {}
+        
+        # Roles for the whole page come back in one IN (...) query
+        user_roles = _roles_by_user([user.user_id for user in users])
         
         users_data = []
-        for user in pagination.items:
-            # Get account status
-            result = db.session.execute(
-                db.text("SELECT CAST(is_active AS UNSIGNED) as is_active, CAST(is_locked AS UNSIGNED) as is_locked FROM iam_user_account WHERE user_id = :user_id"),
-                {"user_id": user.user_id}
-            ).fetchone()
-            
-            is_active_val = bool(result[0]) if result and result[0] is not None else True
-            is_locked_val = bool(result[1]) if result and result[1] is not None else False
-            
+        for user in users:
+            is_active, is_locked = account_status(user)
             users_data.append({
                 "user_id": user.user_id,
                 "username": user.username,
                 "email": user.email,
                 "display_name": user.display_name,
                 "auth_provider": user.auth_provider,
-                "roles": [role.role_name for role in user.roles],
-                "is_active": is_active_val,
-                "is_locked": is_locked_val,
-                "last_login_at": user.last_login_at.isoformat() if user.last_login_at else None,
-                "created_at": user.created_at.isoformat() if user.created_at else None
+                "roles": user_roles.get(user.user_id, []),
+                "is_active": is_active,
+                "is_locked": is_locked,
+                "last_login_at": user.last_login_at,
+                "created_at": user.created_at
             })
         
         return jsonify({
             "users": users_data,
-            "total": pagination.total,
-            "page": page,
             "per_page": per_page,
-            "pages": pagination.pages
+            "next_cursor": _encode_user_cursor(users[-1]) if has_more and users else None,
+            **page_info
         }), 200
         
     except Exception as e:
@@ -179,17 +280,9 @@ def api_users_list():
 def api_user_detail(user_id):
     """REST API get user details endpoint."""
     try:
-        user = IAMUserAccount.query.get_or_404(user_id)
-        
-        # Get account status
-        result = db.session.execute(
-            db.text("SELECT CAST(is_active AS UNSIGNED) as is_active, CAST(is_locked AS UNSIGNED) as is_locked FROM iam_user_account WHERE user_id = :user_id"),
-            {"user_id": user.user_id}
-        ).fetchone()
-        
-        is_active_val = bool(result[0]) if result and result[0] is not None else True
-        is_locked_val = bool(result[1]) if result and result[1] is not None else False
+        user = IAMUserAccount.query.options(joinedload(IAMUserAccount.roles)).filter_by(user_id=user_id).first_or_404()
         
+        is_active, is_locked = account_status(user)
         return jsonify({
             "user": {
                 "user_id": user.user_id,
@@ -199,10 +292,10 @@ def api_user_detail(user_id):
                 "phone_number": user.phone_number,
                 "auth_provider": user.auth_provider,
                 "roles": [role.role_name for role in user.roles],
-                "is_active": is_active_val,
-                "is_locked": is_locked_val,
-                "last_login_at": user.last_login_at.isoformat() if user.last_login_at else None,
-                "created_at": user.created_at.isoformat() if user.created_at else None
+                "is_active": is_active,
+                "is_locked": is_locked,
+                "last_login_at": user.last_login_at,
+                "created_at": user.created_at
             }
         }), 200
         
@@ -216,15 +309,19 @@ def api_roles_list():
     """REST API list roles endpoint."""
     try:
         roles = IAMRole.query.order_by(IAMRole.role_name).all()
+        # Users per role from one GROUP BY, no user rows materialized
+        role_counts = dict(db.session.execute(
+            db.select(IAMUserRole.role_id, db.func.count())
+            .group_by(IAMUserRole.role_id)
+        ).all())
         
         roles_data = []
         for role in roles:
-            user_count = len(role.users.all())
             roles_data.append({
                 "role_id": role.role_id,
                 "role_name": role.role_name,
                 "role_description": role.role_description,
-                "user_count": user_count
+                "user_count": role_counts.get(role.role_id, 0)
             })
         
         return jsonify({"roles": roles_data}), 200
@@ -236,26 +333,57 @@ def api_roles_list():
 @api_bp.get("/audit/logs")
 @login_required
 def api_audit_logs():
-    """REST API audit logs endpoint."""
+    """REST API audit logs endpoint.
+
+    Keyset pagination: pass the previous response's ``next_before_log_id``
+    as ``?before_log_id=`` to fetch the next (older) page. The body is
+    streamed row by row from a server-side cursor.
+    """
     try:
         limit = min(request.args.get('limit', 100, type=int), 500)
+        before_log_id = request.args.get('before_log_id', type=int)
         
-        logs = IAMAuthLog.query.order_by(IAMAuthLog.event_time.desc()).limit(limit).all()
-        
-        logs_data = []
-        for log in logs:
-            logs_data.append({
-                "log_id": log.log_id,
-                "user_id": log.user_id,
-                "username": log.user.username if log.user else None,
-                "event_type": log.event_type,
-                "event_time": log.event_time.isoformat() if log.event_time else None,
-                "ip_address": log.ip_address,
-                "user_agent": log.user_agent,
-                "details": log.details
+        logs_query = (
+            IAMAuthLog.query
+            .with_entities(
+                IAMAuthLog.log_id,
+                IAMAuthLog.user_id,
+                IAMUserAccount.username,
+                IAMAuthLog.event_type,
+                IAMAuthLog.event_time,
+                IAMAuthLog.ip_address,
+                IAMAuthLog.user_agent,
+                IAMAuthLog.details
+            )
+            .outerjoin(IAMUserAccount, IAMUserAccount.user_id == IAMAuthLog.user_id)
+            .order_by(IAMAuthLog.event_time.desc(), IAMAuthLog.log_id.desc())
+        )
+        if before_log_id is not None:
+            # Position of the cursor row in (event_time, log_id) order
+            cursor_time = (
+                db.select(IAMAuthLog.event_time)
+                .where(IAMAuthLog.log_id == before_log_id)
+                .scalar_subquery()
+            )
+            logs_query = logs_query.filter(
+                db.tuple_(IAMAuthLog.event_time, IAMAuthLog.log_id) < db.tuple_(cursor_time, before_log_id)
+            )
+        # Execute now so query errors still become a 500 before streaming starts
+        logs = db.session.execute(logs_query.limit(limit).statement, execution_options={"yield_per": 200})
+
+        def generate():
+            total, last_log_id = 0, None
+            yield b'{"logs":['
+            for log in logs:
+                yield (b"," if total else b"") + dumps_bytes(log._asdict())
+                total, last_log_id = total + 1, log.log_id
+            tail = dumps_bytes({
+                "total": total,
+                "next_before_log_id": last_log_id if total == limit else None
             })
-        
-        return jsonify({"logs": logs_data, "total": len(logs_data)}), 200
+            yield b"]," + tail[1:]
+
+        return Response(stream_with_context(generate()), mimetype="application/json"), 200
         
     except Exception as e:
         return jsonify({"status": "error", "message": f"Server error: {str(e)}"}), 500
@@ -266,17 +394,31 @@ def api_audit_logs():
 def api_active_sessions():
     """REST API list active sessions."""
     try:
-        sessions = IAMAuthSession.query.filter_by(logout_time=None).order_by(IAMAuthSession.login_time.desc()).all()
+        sessions = (
+            IAMAuthSession.query
+            .with_entities(
+                IAMAuthSession.session_id,
+                IAMAuthSession.user_id,
+                IAMUserAccount.username,
+                IAMAuthSession.login_time,
+                IAMAuthSession.ip_address,
+                IAMAuthSession.user_agent
+            )
+            .outerjoin(IAMUserAccount, IAMUserAccount.user_id == IAMAuthSession.user_id)
+            .filter(IAMAuthSession.logout_time.is_(None))
+            .order_by(IAMAuthSession.login_time.desc())
+            .all()
+        )
         
         sessions_data = []
-        for session in sessions:
+        for auth_session in sessions:
             sessions_data.append({
-                "session_id": session.session_id,
-                "user_id": session.user_id,
-                "username": session.user.username if session.user else None,
-                "login_time": session.login_time.isoformat() if session.login_time else None,
-                "ip_address": session.ip_address,
-                "user_agent": session.user_agent
+                "session_id": auth_session.session_id,
+                "user_id": auth_session.user_id,
+                "username": auth_session.username,
+                "login_time": auth_session.login_time,
+                "ip_address": auth_session.ip_address,
+                "user_agent": auth_session.user_agent
             })
         
         return jsonify({"sessions": sessions_data, "total": len(sessions_data)}), 200
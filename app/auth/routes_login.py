@@ -3,6 +3,7 @@ from flask import Blueprint, request, render_template, redirect, url_for, flash,
 from flask_login import login_user, logout_user, login_required, current_user
 from app.extensions import db
 from app.auth.models import IAMUserAccount
+from app.auth.last_login import last_login_writer
 
 auth_bp = Blueprint("auth", __name__, template_folder="templates")
 
@@ -17,31 +18,18 @@ def login_submit():
 
     user = IAMUserAccount.query.filter_by(username=username).first()
     if not user:
+        # Same hashing cost as a real check so response time doesn't reveal unknown usernames
+        IAMUserAccount.verify_dummy_password(password)
         flash("Invalid credentials", "error")
         return redirect(url_for("auth.login_page"))
     
-    if not user.verify_password(password):
+    if not user.verify_password_cached(password):
         flash("Invalid credentials", "error")
         return redirect(url_for("auth.login_page"))
 
-    # Check account status - use direct query to avoid method shadowing issues
-    from app.extensions import db
-    result = db.session.execute(
-        db.text("SELECT CAST(is_active AS UNSIGNED) as is_active, CAST(is_locked AS UNSIGNED) as is_locked FROM iam_user_account WHERE user_id = :user_id"),
-        {"user_id": user.user_id}
-    ).fetchone()
-    
-    # Debug logging
-    current_app.logger.info(f"Login attempt for {username}: result={result}")
-    
-    if result:
-        is_active_val = bool(result[0]) if result[0] is not None else True
-        is_locked_val = bool(result[1]) if result[1] is not None else False
-        account_active = is_active_val and not is_locked_val
-        current_app.logger.info(f"Account check: is_active={is_active_val}, is_locked={is_locked_val}, account_active={account_active}")
-    else:
-        account_active = True  # Default to active if can't check
-        current_app.logger.warning(f"No result from database query for user_id={user.user_id}")
+    # Check account status (columns already loaded with the user row)
+    account_active = user.is_active_account
+    current_app.logger.info(f"Account check for {username}: is_active={user.is_active}, is_locked={user.is_locked}, account_active={account_active}")
     
     if not account_active:
         current_app.logger.warning(f"Login blocked for {username}: account inactive or locked")
@@ -51,8 +39,9 @@ def login_submit():
     # TODO: MFA challenge hook goes here
     login_user(user)
 
-    user.last_login_at = db.func.now()
-    db.session.commit()
+    last_login_writer.record(user.user_id)  # written in the background
+    if db.session.dirty:
+        db.session.commit()  # e.g. password hash upgraded by verify_password
 
     return redirect(url_for("admin.dashboard"))
 
@@ -0,0 +1,112 @@
+# app/cli.py
+"""
+IAM CLI commands (flask test-db, create-test-user, init-db).
+Kept out of the app factory so their imports are only paid when a command runs.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app.extensions import db
+
+_SELECT_ONE = db.text("SELECT 1 as test")
+_SHOW_IAM_TABLES = db.text("SHOW TABLES LIKE 'iam_%'")
+
+
+@click.command("test-db")
+@with_appcontext
+def test_db():
+    """Test database connection."""
+    try:
+        # Both probes share one pooled connection
+        with db.engine.connect() as conn:
+            row = conn.execute(_SELECT_ONE).fetchone()
+            if row and row[0] == 1:
+                print("✅ Database connection successful!")
+                # Try to query tables
+                try:
+                    tables = conn.execute(_SHOW_IAM_TABLES).fetchall()
+                    if tables:
+                        print(f"✅ Found {len(tables)} IAM tables")
+                        for table in tables:
+                            print(f"   - {table[0]}")
+                    else:
+                        print("⚠️  No IAM tables found. Run 'flask db upgrade' to create them.")
+                except Exception as e:
+                    print(f"⚠️  Could not check tables: {e}")
+                return True
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        print(f"\nConnection string: {current_app.config.get('SQLALCHEMY_DATABASE_URI', 'Not set')}")
+        print("\nTroubleshooting:")
+        print("1. Ensure MySQL is running: mysql.server start (or brew services start mysql)")
+        print("2. Check database exists: mysql -u root -e 'SHOW DATABASES'")
+        print("3. Create database if needed: mysql -u root < db/iam_schema.sql")
+        return False
+
+
+@click.command("create-test-user")
+@with_appcontext
+def create_test_user():
+    """Create a test user for development."""
+    from app.auth.models import IAMUserAccount, IAMRole, IAMUserRole
+    from sqlalchemy.exc import OperationalError
+
+    try:
+        username = input("Username (default: testuser): ").strip() or "testuser"
+        password = input("Password (default: testpass123): ").strip() or "testpass123"
+        email = input(f"Email (default: {username}@example.com): ").strip() or f"{username}@example.com"
+
+        # Check if user exists
+        if IAMUserAccount.query.filter_by(username=username).first():
+            print(f"❌ User '{username}' already exists!")
+            return
+
+        # Create user
+        user = IAMUserAccount(
+            username=username,
+            email=email,
+            display_name=username.title(),
+            parent_id=1,  # Default tenant
+            auth_provider='local',
+            is_active=True,  # Explicitly set active
+            is_locked=False  # Explicitly set not locked
+        )
+        user.set_password(password)
+        db.session.add(user)
+        db.session.flush()  # assigns user.user_id
+
+        # Try to assign admin role if it exists. Role rows go in as one
+        # executemany INSERT so seed scripts can pass many role ids here.
+        role_ids = [r.role_id for r in IAMRole.query.filter_by(role_name='admin')]
+        if role_ids:
+            db.session.execute(
+                db.insert(IAMUserRole),
+                [{"user_id": user.user_id, "role_id": role_id, "assigned_by": "cli"} for role_id in role_ids]
+            )
+
+        db.session.commit()
+
+        print(f"✅ Created user: {username}")
+        print(f"   Email: {email}")
+        print(f"   Roles: {[r.role_name for r in user.roles]}")
+        print(f"\nYou can now login at: http://127.0.0.1:5000/auth/login")
+    except OperationalError as e:
+        print(f"❌ Database connection failed: {e}")
+        print("\nMySQL is not running. Please start MySQL first:")
+        print("   - Docker: docker-compose up -d mysql")
+        print("   - Homebrew: brew services start mysql")
+        print("   - Manual: mysql.server start")
+        print("\nThen create the database:")
+        print("   mysql -u root < db/iam_schema.sql")
+        raise
+
+
+@click.command("init-db")
+@with_appcontext
+def init_db():
+    """Initialize database tables."""
+    db.create_all()
+    print("Database tables created.")
+
+
+iam_commands = (test_db, create_test_user, init_db)
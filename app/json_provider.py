@@ -0,0 +1,40 @@
+# app/json_provider.py
+"""
+orjson-backed JSON provider for Flask (app.json).
+Serializes datetimes natively, in the same form as .isoformat() (no zone added).
+"""
+import decimal
+import orjson
+from flask.json.provider import JSONProvider
+
+# Stringify non-str dict keys (e.g. {user_id: ...}) like json.dumps does
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # Types orjson doesn't handle natively but Flask's default provider did
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj) -> bytes:
+    """Serialize with the app's orjson settings, returning bytes."""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+class OrjsonProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
@@ -14,7 +14,7 @@ USE iam;
 CREATE TABLE iam_user_account (
     user_id             INT AUTO_INCREMENT PRIMARY KEY,
     parent_id           INT             NOT NULL,  -- tenant (ultimate parent)
-    username            VARCHAR(150)    NOT NULL UNIQUE,
+    username            VARCHAR(150)    NOT NULL UNIQUE,  -- login lookup
     email               VARCHAR(255)    NOT NULL UNIQUE,
     phone_number        VARCHAR(50)     NULL,
     display_name        VARCHAR(255)    NOT NULL,
@@ -28,7 +28,9 @@ CREATE TABLE iam_user_account (
     updated_at          TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     created_by          VARCHAR(255)    NULL,
     updated_by          VARCHAR(255)    NULL,
-    CONSTRAINT uq_iam_user_email UNIQUE (email)
+    -- email's column-level UNIQUE is its only index; existing databases created
+    -- with the old duplicate can drop it: ALTER TABLE iam_user_account DROP INDEX uq_iam_user_email;
+    INDEX ix_user_created_at (created_at DESC, user_id DESC)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- ------------------------------------------------------------
@@ -53,6 +55,7 @@ CREATE TABLE iam_user_role (
     assigned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     assigned_by VARCHAR(255) NULL,
     PRIMARY KEY (user_id, role_id),
+    INDEX ix_iam_user_role_role_id (role_id),
     CONSTRAINT fk_iam_user_role_user
         FOREIGN KEY (user_id) REFERENCES iam_user_account(user_id)
         ON DELETE CASCADE ON UPDATE CASCADE,
@@ -74,6 +77,7 @@ CREATE TABLE iam_auth_session (
     user_agent          VARCHAR(255)    NULL,
     sso_idp_session_ref VARCHAR(255)    NULL,
     created_at          TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_session_active_login (logout_time, login_time DESC),
     CONSTRAINT fk_iam_auth_session_user
         FOREIGN KEY (user_id) REFERENCES iam_user_account(user_id)
         ON DELETE CASCADE ON UPDATE CASCADE
@@ -93,6 +97,8 @@ CREATE TABLE iam_mfa_method (
     is_active       BIT(1)          NOT NULL DEFAULT b'1',
     created_at      TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at      TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX ix_mfa_active_created (is_active, created_at DESC),
+    INDEX ix_mfa_user_active (user_id, is_active),
     CONSTRAINT fk_iam_mfa_user
         FOREIGN KEY (user_id) REFERENCES iam_user_account(user_id)
         ON DELETE CASCADE ON UPDATE CASCADE
@@ -132,6 +138,8 @@ CREATE TABLE iam_auth_log (
     ip_address      VARCHAR(64)     NULL,
     user_agent      VARCHAR(255)    NULL,
     details         TEXT            NULL,
+    INDEX ix_auth_log_event_time_log_id (event_time DESC, log_id DESC),
+    INDEX ix_auth_log_user_id (user_id),
     CONSTRAINT fk_iam_authlog_user
         FOREIGN KEY (user_id) REFERENCES iam_user_account(user_id)
         ON DELETE SET NULL ON UPDATE CASCADE
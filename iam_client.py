@@ -9,8 +9,17 @@ Usage:
     
     client = IAMClient(base_url="https://iam.yourdomain.com")
     result = client.login("username", "password")
+
+Async usage (requires: pip install "httpx[http2]"):
+    from iam_client import AsyncIAMClient
+    
+    async with AsyncIAMClient(base_url="https://iam.yourdomain.com") as client:
+        await client.login("username", "password")
+        users, roles = await asyncio.gather(client.list_users(), client.list_roles())
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, List
 import warnings
 
@@ -18,16 +27,36 @@ import warnings
 class IAMClient:
     """Client for IAM service REST API."""
     
-    def __init__(self, base_url: str, session_cookie: Optional[str] = None):
+    def __init__(self, base_url: str, session_cookie: Optional[str] = None,
+                 pool_maxsize: int = 50, max_retries: int = 3):
         """
         Initialize IAM client.
         
         Args:
             base_url: Base URL of IAM service (e.g., "https://iam.yourdomain.com")
             session_cookie: Optional session cookie for authenticated requests
+            pool_maxsize: Keep-alive connections kept per host (default: 50)
+            max_retries: Retries with backoff on 502/503/504 (default: 3)
         """
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
+        
+        # Reuse keep-alive connections (no handshake per call) and retry
+        # transient gateway errors with backoff instead of failing immediately
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=max_retries,
+                backoff_factor=0.2,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset(["GET", "POST"]),
+                raise_on_status=False  # hand back the last response; raise_for_status() reports it
+            )
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
         if session_cookie:
             self.session.cookies.set('session', session_cookie)
     
@@ -98,18 +127,24 @@ class IAMClient:
         response.raise_for_status()
         return response.json()
     
-    def list_users(self, page: int = 1, per_page: int = 50) -> Dict:
+    def list_users(self, page: Optional[int] = None, per_page: int = 50,
+                   cursor: Optional[str] = None) -> Dict:
         """
         List all users with pagination.
         
         Args:
-            page: Page number (default: 1)
+            page: Page number for offset paging (deprecated; prefer cursor)
             per_page: Items per page (default: 50, max: 100)
+            cursor: next_cursor from the previous response (omit for first page)
             
         Returns:
-            Dict with users list and pagination info
+            Dict with users list and next_cursor (None on the last page)
         """
-        params = {"page": page, "per_page": min(per_page, 100)}
+        params = {"per_page": min(per_page, 100)}
+        if page is not None:
+            params["page"] = page
+        if cursor:
+            params["cursor"] = cursor
         response = self.session.get(f"{self.base_url}/api/users", params=params, timeout=10)
         response.raise_for_status()
         return response.json()
@@ -125,17 +160,20 @@ class IAMClient:
         response.raise_for_status()
         return response.json()
     
-    def get_audit_logs(self, limit: int = 100) -> Dict:
+    def get_audit_logs(self, limit: int = 100, before_log_id: Optional[int] = None) -> Dict:
         """
         Get recent audit logs.
         
         Args:
             limit: Maximum number of logs (default: 100, max: 500)
+            before_log_id: next_before_log_id from the previous page (omit for newest)
             
         Returns:
-            Dict with audit logs list
+            Dict with audit logs list and next_before_log_id
         """
         params = {"limit": min(limit, 500)}
+        if before_log_id is not None:
+            params["before_log_id"] = before_log_id
         response = self.session.get(f"{self.base_url}/api/audit/logs", params=params, timeout=10)
         response.raise_for_status()
         return response.json()
@@ -163,6 +201,105 @@ class IAMClient:
         return response.json()
 
 
+class AsyncIAMClient:
+    """
+    Async client for IAM service REST API (httpx).
+    Lets callers fetch unrelated resources concurrently with asyncio.gather();
+    with http2=True (and the h2 package) they share one multiplexed connection.
+    """
+    
+    def __init__(self, base_url: str, session_cookie: Optional[str] = None, http2: bool = False):
+        """
+        Initialize async IAM client.
+        
+        Args:
+            base_url: Base URL of IAM service (e.g., "https://iam.yourdomain.com")
+            session_cookie: Optional session cookie for authenticated requests
+            http2: Negotiate HTTP/2 when the httpx[http2] extra is installed,
+                   otherwise stay on HTTP/1.1 (default: False)
+        """
+        import httpx  # optional dependency, only needed for the async client
+        
+        if http2:
+            try:
+                import h2  # noqa: F401  httpx raises ImportError on http2=True without it
+            except ImportError:
+                http2 = False
+        
+        self.base_url = base_url.rstrip('/')
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            timeout=10,
+            cookies={'session': session_cookie} if session_cookie else None
+        )
+    
+    async def __aenter__(self) -> "AsyncIAMClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the underlying connection pool."""
+        await self._client.aclose()
+    
+    async def _get(self, path: str, params: Optional[Dict] = None, timeout: float = 5) -> Dict:
+        response = await self._client.get(path, params=params, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    async def _post(self, path: str, json: Optional[Dict] = None, timeout: float = 5) -> Dict:
+        response = await self._client.post(path, json=json, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    async def login(self, username: str, password: str) -> Dict:
+        """Authenticate user; the session cookie is kept on the client."""
+        return await self._post("/api/auth/login", json={"username": username, "password": password}, timeout=10)
+    
+    async def verify_session(self) -> Dict:
+        """Verify current session is valid."""
+        return await self._get("/api/auth/verify")
+    
+    async def logout(self) -> Dict:
+        """Invalidate current session."""
+        return await self._post("/api/auth/logout")
+    
+    async def get_user(self, user_id: int) -> Dict:
+        """Get user details by ID."""
+        return await self._get(f"/api/users/{user_id}")
+    
+    async def list_users(self, page: Optional[int] = None, per_page: int = 50,
+                         cursor: Optional[str] = None) -> Dict:
+        """List users (see IAMClient.list_users for paging)."""
+        params = {"per_page": min(per_page, 100)}
+        if page is not None:
+            params["page"] = page
+        if cursor:
+            params["cursor"] = cursor
+        return await self._get("/api/users", params=params, timeout=10)
+    
+    async def list_roles(self) -> Dict:
+        """List all roles."""
+        return await self._get("/api/roles")
+    
+    async def get_audit_logs(self, limit: int = 100, before_log_id: Optional[int] = None) -> Dict:
+        """Get recent audit logs (see IAMClient.get_audit_logs for paging)."""
+        params = {"limit": min(limit, 500)}
+        if before_log_id is not None:
+            params["before_log_id"] = before_log_id
+        return await self._get("/api/audit/logs", params=params, timeout=10)
+    
+    async def get_active_sessions(self) -> Dict:
+        """Get list of active sessions."""
+        return await self._get("/api/sessions/active")
+    
+    async def health_check(self) -> Dict:
+        """Check IAM service health."""
+        return await self._get("/healthz")
+
+
 # Example usage
 if __name__ == "__main__":
     import sys
@@ -215,7 +352,7 @@ if __name__ == "__main__":
     print("\nTesting list users...")
     try:
         result = client.list_users(per_page=5)
-        print(f"✅ Found {result.get('total', 0)} users")
+        print(f"✅ Found {len(result.get('users', []))} users (first page)")
         for user in result.get('users', [])[:3]:
             print(f"   - {user.get('username')} ({user.get('email')})")
     except Exception as e:
@@ -62,7 +62,7 @@ def test_endpoints():
         print(f"   Status: {response.status_code}")
         if response.status_code == 200:
             data = json.loads(response.data)
-            print(f"   ✅ Total users: {data.get('total', 0)}")
+            print(f"   ✅ Users on first page: {len(data.get('users', []))}")
             for user in data.get('users', [])[:3]:
                 print(f"      - {user.get('username')}")
         
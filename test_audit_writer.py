@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Background audit-writer tests (in-memory SQLite, no MySQL needed).
+Usage: python -m pytest test_audit_writer.py
+"""
+from datetime import datetime
+import pytest
+from app import create_app
+from app.config import TestConfig
+from app.extensions import db
+from app.auth.models import IAMAuthLog
+from app.auth.audit_writer import audit_writer
+
+
+class SQLiteTestConfig(TestConfig):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # pool sizing is for MySQL; SQLite uses a StaticPool
+
+
+@pytest.fixture
+def app():
+    app = create_app(SQLiteTestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_shutdown_writes_queued_events(app):
+    for i in range(25):
+        audit_writer.submit({
+            "user_id": None,
+            "event_type": "login_failed",
+            "event_time": datetime(2024, 1, 1, 0, 0, i),
+            "ip_address": "127.0.0.1",
+            "user_agent": "pytest",
+            "details": f"attempt {i}",
+        })
+
+    audit_writer.shutdown()  # what atexit runs
+
+    assert db.session.scalar(db.select(db.func.count()).select_from(IAMAuthLog)) == 25
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+JSON provider regression tests (no database needed).
+Usage: python -m pytest test_json_provider.py
+"""
+import datetime
+import decimal
+from app.json_provider import dumps_bytes
+
+
+def test_int_keyed_dict_is_serialized_like_json_dumps():
+    assert dumps_bytes({1: "a", 2: {3: True}}) == b'{"1":"a","2":{"3":true}}'
+
+
+def test_datetimes_keep_the_isoformat_form():
+    when = datetime.datetime(2024, 5, 1, 12, 30, 15)
+    assert dumps_bytes({"at": when}) == f'{{"at":"{when.isoformat()}"}}'.encode()
+
+
+def test_decimal_falls_back_to_str():
+    assert dumps_bytes([decimal.Decimal("1.50")]) == b'["1.50"]'
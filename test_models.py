@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Model-level regression tests (in-memory SQLite, no MySQL needed).
+Usage: python -m pytest test_models.py
+"""
+import pytest
+from sqlalchemy.orm import selectinload
+from app import create_app
+from app.config import TestConfig
+from app.extensions import db
+from app.auth.models import IAMUserAccount, IAMRole
+
+
+class SQLiteTestConfig(TestConfig):
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # pool sizing is for MySQL; SQLite uses a StaticPool
+    SQLALCHEMY_RAISELOAD = False
+
+
+@pytest.fixture
+def app():
+    app = create_app(SQLiteTestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def user(app):
+    user = IAMUserAccount(parent_id=1, username="alice", email="alice@example.com", display_name="Alice")
+    user.roles.append(IAMRole(role_name="admin"))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_refresh_of_loaded_user_resets_role_cache(user):
+    assert user.has_role("admin")
+
+    # Re-populating an instance the session already holds fires the "refresh" event
+    db.session.get(IAMUserAccount, user.user_id, options=[selectinload(IAMUserAccount.roles)], populate_existing=True)
+    db.session.refresh(user)
+
+    assert "_role_names" not in user.__dict__
+    assert user.has_role("admin")
+
+
+def test_expire_resets_role_cache(user):
+    assert user.has_role("admin")
+    db.session.expire(user)
+    assert "_role_names" not in user.__dict__
+    assert user.has_role("admin")
+
+
+def test_raiseload_stays_scoped_to_test_apps(user):
+    class RaiseloadConfig(SQLiteTestConfig):
+        SQLALCHEMY_RAISELOAD = True
+
+    create_app(RaiseloadConfig)  # registers the hook on the shared Session class
+
+    # The app from the fixture didn't opt in, so lazy loads keep working
+    db.session.expire_all()
+    reloaded = db.session.get(IAMUserAccount, user.user_id)
+    assert [role.role_name for role in reloaded.roles] == ["admin"]
@@ -15,11 +15,16 @@ What it does:
     4. Injects fresh placeholder at top of changelog
     5. Updates CURRENT ACTIVE VERSION
 """
+import json
+import mmap
+import os
 import re
 import sys
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 
 # Files that contain version strings
@@ -36,11 +41,62 @@ VERSION_FILES = [
 # Current project directory
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# Remembers which files held no version string at all, keyed on path with mtime + size
+SCAN_CACHE_FILE = PROJECT_ROOT / '.tools-cache/bump_version.json'
 
-def get_current_version() -> Tuple[int, int, int]:
+# Any X.Y.Z version; a file without one can't contain whatever the old version is
+ANY_VERSION_RE = re.compile(rb'\d+\.\d+\.\d+')
+
+# Version line in the changelog
+CHANGELOG_VERSION_RE = re.compile(r'IAM v(\d+)\.(\d+)\.(\d+)')
+
+# CURRENT ACTIVE VERSION section: ## 🔢 CURRENT ACTIVE VERSION\n**IAM vX.Y.Z (DATE)** – DESCRIPTION
+CURRENT_VERSION_HEADING = '## 🔢 CURRENT ACTIVE VERSION'
+CURRENT_VERSION_LINE_RE = re.compile(r'\*\*IAM v(\d+\.\d+\.\d+)( \([\d-]+\))\*\*')
+
+# Changelog section the new version placeholder goes in front of
+HISTORY_HEADING = '## 🕒 VERSION HISTORY'
+
+# Versions packed into one int as major << 40 | minor << 20 | rev
+VERSION_FIELD_BITS = 20
+VERSION_FIELD_MASK = (1 << VERSION_FIELD_BITS) - 1
+
+# bump type -> (fields to clear, amount to add) on a packed version
+BUMP_OPS = {
+    'rev': (0, 1),
+    'minor': (VERSION_FIELD_MASK, 1 << VERSION_FIELD_BITS),
+    'major': ((1 << 2 * VERSION_FIELD_BITS) - 1, 1 << 2 * VERSION_FIELD_BITS),
+}
+
+# Every version string form update_file_version rewrites, as one alternation
+# ({old} is the escaped old version). Group name -> replacement template.
+VERSION_PATTERN_TEMPLATE = (
+    # v1.2.3 in various contexts
+    r'(?P<prefixed>\bv{old}\b)'
+    # Version fields in variable assignments or strings
+    # e.g., "version": "1.2.3" or __version__ = "1.2.3"
+    r'|(?P<json_d>"version": "{old}")'
+    r"|(?P<json_s>'version': '{old}')"
+    r'|(?P<dunder_d>__version__ = "{old}")'
+    r"|(?P<dunder_s>__version__ = '{old}')"
+    r'|(?P<bare>\b{old}\b)'  # Fallback for bare versions
+)
+VERSION_REPLACEMENTS = {
+    'prefixed': 'v{new}',
+    'json_d': '"version": "{new}"',
+    'json_s': "'version': '{new}'",
+    'dunder_d': '__version__ = "{new}"',
+    'dunder_s': "__version__ = '{new}'",
+    'bare': '{new}',
+}
+
+
+def get_current_version() -> Tuple[int, int, int, str]:
     """
     Read current version from changelog.
-    Returns: (major, minor, revision)
+    Repeat calls (when imported by other tools) reuse the last parse
+    until the changelog's mtime or size changes.
+    Returns: (major, minor, revision, changelog content)
     """
     changelog = PROJECT_ROOT / 'docs/iam_changelog.md'
     
@@ -48,16 +104,49 @@ def get_current_version() -> Tuple[int, int, int]:
         print(f"❌ Error: {changelog} not found")
         sys.exit(1)
     
-    content = changelog.read_text()
+    stat = changelog.stat()
+    return read_current_version(changelog, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1)
+def read_current_version(changelog: Path, mtime_ns: int, size: int) -> Tuple[int, int, int, str]:
+    """
+    get_current_version() for a given state of the changelog;
+    mtime_ns and size are only there to key the cache.
+    """
+    content = changelog.read_text(encoding='utf-8')
     
     # Look for "CURRENT ACTIVE VERSION" section
-    match = re.search(r'IAM v(\d+)\.(\d+)\.(\d+)', content)
+    match = CHANGELOG_VERSION_RE.search(content)
     if not match:
         print("❌ Error: Could not find version in changelog")
         sys.exit(1)
     
     major, minor, rev = map(int, match.groups())
-    return major, minor, rev
+    return major, minor, rev, content
+
+
+def pack_version(major: int, minor: int, rev: int) -> int:
+    """
+    Pack (major, minor, revision) into one int; minor and revision get 20 bits each,
+    and must stay below the field maximum so a bump can't carry into the next field.
+    """
+    if minor >= VERSION_FIELD_MASK or rev >= VERSION_FIELD_MASK:
+        raise ValueError(f"Version field too large to pack: {major}.{minor}.{rev}")
+    return major << 2 * VERSION_FIELD_BITS | minor << VERSION_FIELD_BITS | rev
+
+
+def unpack_version(packed: int) -> Tuple[int, int, int]:
+    """Inverse of pack_version."""
+    return (packed >> 2 * VERSION_FIELD_BITS,
+            packed >> VERSION_FIELD_BITS & VERSION_FIELD_MASK,
+            packed & VERSION_FIELD_MASK)
+
+
+def bump_packed(packed: int, bump_type: str) -> int:
+    """Bump a packed version: clear the lower fields, then add one to the bumped field."""
+    clear, add = BUMP_OPS[bump_type]
+    return (packed & ~clear) + add
 
 
 def bump_version(major: int, minor: int, rev: int, bump_type: str) -> Tuple[int, int, int]:
@@ -65,25 +154,25 @@ def bump_version(major: int, minor: int, rev: int, bump_type: str) -> Tuple[int,
     Bump version according to type.
     Returns: (new_major, new_minor, new_rev)
     """
-    if bump_type == 'rev':
-        return major, minor, rev + 1
-    elif bump_type == 'minor':
-        return major, minor + 1, 0
-    elif bump_type == 'major':
-        return major + 1, 0, 0
-    else:
+    if bump_type not in BUMP_OPS:
         print(f"❌ Error: Unknown bump type '{bump_type}'. Use: rev, minor, or major")
         sys.exit(1)
+    try:
+        packed = pack_version(major, minor, rev)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    return unpack_version(bump_packed(packed, bump_type))
 
 
-def update_changelog(old_version: str, new_version: str, bump_type: str) -> None:
+def update_changelog(content: str, old_version: str, new_version: str, bump_type: str) -> None:
     """
     Update changelog with new version placeholder.
+    content is the changelog as already read by get_current_version().
     """
     changelog = PROJECT_ROOT / 'docs/iam_changelog.md'
-    content = changelog.read_text()
     
-    today = datetime.now().strftime('%Y-%m-%d')
+    today = date.today().isoformat()  # YYYY-MM-DD
     
     # Generate placeholder based on bump type
     if bump_type == 'rev':
@@ -104,74 +193,203 @@ def update_changelog(old_version: str, new_version: str, bump_type: str) -> None
 
 """
     
-    # Update CURRENT ACTIVE VERSION section
-    # Pattern to match: ## 🔢 CURRENT ACTIVE VERSION\n**IAM vX.Y.Z (DATE)** – DESCRIPTION
-    current_version_pattern = r'(## 🔢 CURRENT ACTIVE VERSION\n\*\*IAM v)(\d+\.\d+\.\d+)( \([\d-]+\))\*\*(.*?)(\n\n---)'
-    replacement = rf'\1{new_version}\3*\*\* {change_type.lower()}.\4\5'
-    content = re.sub(current_version_pattern, replacement, content, flags=re.DOTALL)
+    # Write the pieces as they are rather than joining them into another full copy
+    write_segments(changelog, changelog_segments(content, new_version, change_type, placeholder))
+    print(f"✅ Updated {changelog}")
+
+
+def changelog_segments(content: str, new_version: str, change_type: str, placeholder: str) -> List[str]:
+    """
+    Rewrite the changelog in a single pass over its lines:
+      - the **IAM vX.Y.Z (DATE)** line under CURRENT ACTIVE VERSION gets the new
+        version and change type (only once a blank line + "---" closes the section)
+      - whatever sits between the last "---" and VERSION HISTORY becomes the placeholder
+    Returns: the new content as a few segments (slices of content and the edits)
+    """
+    edits = []             # (start, end, replacement) in content order
+    pending = None         # edits for a CURRENT ACTIVE VERSION section not closed yet
+    section_from = 0       # a section can't start inside the previous one
+    after_heading = False  # previous line ended with CURRENT_VERSION_HEADING
+    prev_blank = False
+    last_separator = history_start = -1
+    
+    start = 0
+    while start <= len(content):
+        end = content.find('\n', start)
+        if end == -1:
+            end = len(content)
+        line = content[start:end]
+        
+        # Insertion point: after the last "---" before the first VERSION HISTORY heading
+        if history_start == -1:
+            heading = line.find(HISTORY_HEADING)
+            separator = line.rfind('---', 0, len(line) if heading == -1 else heading)
+            if separator != -1:
+                last_separator = start + separator
+            if heading != -1:
+                history_start = start + heading
+        
+        # CURRENT ACTIVE VERSION: heading line, version line, ..., blank line, "---"
+        if pending is not None:
+            if prev_blank and line.startswith('---'):
+                edits.extend(pending)
+                pending = None
+                section_from = start + 3
+        elif after_heading:
+            match = CURRENT_VERSION_LINE_RE.match(line)
+            if match:
+                pending = [
+                    (start + match.start(1), start + match.end(1), new_version),
+                    (start + match.end(), start + match.end(), f' {change_type.lower()}.'),
+                ]
+        after_heading = (pending is None and line.endswith(CURRENT_VERSION_HEADING)
+                         and end - len(CURRENT_VERSION_HEADING) >= section_from)
+        prev_blank = not line
+        start = end + 1
     
-    # Find insertion point: after "---" that follows CURRENT ACTIVE VERSION, before "## 🕒 VERSION HISTORY"
-    # Split into two parts at the insertion point
-    history_start = content.find('## 🕒 VERSION HISTORY')
     if history_start == -1:
-        print("⚠️ Warning: Could not find '## 🕒 VERSION HISTORY' section")
+        print(f"⚠️ Warning: Could not find '{HISTORY_HEADING}' section")
         history_start = len(content)
     
-    # Find the "---" marker before VERSION HISTORY
-    before_history = content[:history_start]
-    last_separator = before_history.rfind('---')
-    
     if last_separator != -1:
-        # Insert placeholder after the last "---" and before VERSION HISTORY
-        new_content = (
-            content[:last_separator + 3] +  # Up to and including "---"
-            '\n\n' + placeholder +  # Add placeholder
-            content[history_start:]  # Rest of content
-        )
-        content = new_content
+        # Insert placeholder after the last "---" and before VERSION HISTORY;
+        # edits inside the replaced stretch go with it
+        cut_start, cut_end = last_separator + 3, history_start
+        edits = [edit for edit in edits if not (cut_start <= edit[0] and edit[1] <= cut_end)]
+        edits.append((cut_start, cut_end, '\n\n' + placeholder))
+        edits.sort(key=lambda edit: edit[0])
     
-    changelog.write_text(content)
-    print(f"✅ Updated {changelog}")
+    segments, cursor = [], 0
+    for edit_start, edit_end, replacement in edits:
+        segments += [content[cursor:edit_start], replacement]
+        cursor = edit_end
+    segments.append(content[cursor:])
+    return segments
+
+
+def write_segments(file_path: Path, segments: List[str]) -> None:
+    """
+    Replace file_path's contents with the UTF-8 encoded segments,
+    using a single gather write (os.writev) where the platform has one.
+    """
+    chunks = [segment.encode('utf-8') for segment in segments]
+    if not hasattr(os, 'writev'):  # Windows
+        with file_path.open('wb') as f:
+            f.writelines(chunks)
+        return
+    
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while chunks:
+            written = os.writev(fd, chunks)
+            # writev may stop short; drop what was written and go again
+            while chunks and written >= len(chunks[0]):
+                written -= len(chunks.pop(0))
+            if written:
+                chunks[0] = chunks[0][written:]
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=None)
+def version_pattern(old_version: str) -> re.Pattern:
+    """
+    Compiled version-string alternation for old_version.
+    Built once per run and shared by every file.
+    """
+    # Versions are X.Y.Z built from ints, so '.' is the only metacharacter to escape
+    return re.compile(VERSION_PATTERN_TEMPLATE.format(old=old_version.replace('.', r'\.')))
+
 
+def load_scan_cache() -> dict:
+    """Load the scan cache; a missing or unreadable cache is just empty."""
+    try:
+        return json.loads(SCAN_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
 
-def update_file_version(file_path: Path, old_version: str, new_version: str) -> bool:
+
+def save_scan_cache(scan_cache: dict) -> None:
+    """Persist the scan cache. Failing to write it only costs the next run a re-read."""
+    try:
+        SCAN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        SCAN_CACHE_FILE.write_text(json.dumps(scan_cache, indent=2, sort_keys=True))
+    except OSError as e:
+        print(f"⚠️ Warning: Could not write {SCAN_CACHE_FILE}: {e}")
+
+
+def remember_scan(scan_cache: Optional[dict], file_path: Path, has_version: bool) -> None:
+    """Record whether file_path (as it is on disk now) contains any version string."""
+    if scan_cache is None:
+        return
+    stat = file_path.stat()
+    scan_cache[str(file_path)] = {
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'has_version': has_version,
+    }
+
+
+def update_file_version(file_path: Path, old_version: str, new_version: str,
+                        scan_cache: Optional[dict] = None) -> bool:
     """
     Update version strings in a file.
+    scan_cache (see load_scan_cache) lets unchanged files without any
+    version string be skipped without reading them.
     Returns: True if updated, False if not found
     """
     if not file_path.exists():
         return False
     
-    content = file_path.read_text()
-    original = content
+    if scan_cache is not None:
+        entry = scan_cache.get(str(file_path))
+        stat = file_path.stat()
+        if (entry and not entry['has_version']
+                and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size):
+            return False
     
-    # Pattern 1: v1.2.3 or 1.2.3 in various contexts
-    patterns = [
-        (rf'\bv{re.escape(old_version)}\b', f'v{new_version}'),
-        (rf'\b{re.escape(old_version)}\b', new_version),  # Fallback for bare versions
-    ]
+    with file_path.open('rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # mmap can't map an empty file
+            remember_scan(scan_cache, file_path, False)
+            return False
+        # Plain bytes substring check straight off the page cache, before copying or
+        # decoding anything; most files never contain the old version
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped.find(old_version.encode('ascii')) == -1:
+                has_version = ANY_VERSION_RE.search(mapped) is not None
+                remember_scan(scan_cache, file_path, has_version)
+                return False
+        content = f.read().decode('utf-8')
     
-    # Pattern 2: Version fields in variable assignments or strings
-    # e.g., "version": "1.2.3" or __version__ = "1.2.3"
-    patterns.extend([
-        (rf'"version": "{re.escape(old_version)}"', f'"version": "{new_version}"'),
-        (rf"'version': '{re.escape(old_version)}'", f"'version': '{new_version}'"),
-        (rf'__version__ = "{re.escape(old_version)}"', f'__version__ = "{new_version}"'),
-        (rf'__version__ = \'{re.escape(old_version)}\'', f"__version__ = '{new_version}'"),
-    ])
-    
-    updated = False
-    for pattern, replacement in patterns:
-        if re.search(pattern, content):
-            content = re.sub(pattern, replacement, content)
-            updated = True
-    
-    if content != original:
-        file_path.write_text(content)
-        print(f"✅ Updated {file_path}")
-        return True
+    replacements = {group: template.format(new=new_version)
+                    for group, template in VERSION_REPLACEMENTS.items()}
     
-    return False
+    # One pass over the file; subn's count says whether anything matched
+    content, count = version_pattern(old_version).subn(
+        lambda match: replacements[match.lastgroup], content
+    )
+    
+    if count:
+        file_path.write_bytes(content.encode('utf-8'))
+    remember_scan(scan_cache, file_path, True)
+    return bool(count)
+
+
+def bump_files(file_paths: List[Path], old_version: str, new_version: str,
+               scan_cache: Optional[dict] = None) -> List[Path]:
+    """
+    Update version strings in many files (e.g. across several project roots).
+    The files are independent, so they're processed concurrently.
+    Returns: the paths that were updated, in the order given
+    """
+    if not file_paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+        results = executor.map(
+            lambda file_path: update_file_version(file_path, old_version, new_version, scan_cache),
+            file_paths,
+        )
+        return [file_path for file_path, updated in zip(file_paths, results) if updated]
 
 
 def main():
@@ -193,7 +411,7 @@ def main():
         sys.exit(1)
     
     # Get current version
-    major, minor, rev = get_current_version()
+    major, minor, rev, changelog_content = get_current_version()
     old_version = f"{major}.{minor}.{rev}"
     
     # Bump version
@@ -204,12 +422,17 @@ def main():
     print()
     
     # Update changelog first (adds placeholder)
-    update_changelog(old_version, new_version, bump_type)
+    update_changelog(changelog_content, old_version, new_version, bump_type)
     
     # Update all other files
-    for relative_path in VERSION_FILES:
-        file_path = PROJECT_ROOT / relative_path
-        update_file_version(file_path, old_version, new_version)
+    scan_cache = load_scan_cache()
+    updated_paths = bump_files(
+        [PROJECT_ROOT / relative_path for relative_path in VERSION_FILES],
+        old_version, new_version, scan_cache,
+    )
+    save_scan_cache(scan_cache)
+    for file_path in updated_paths:
+        print(f"✅ Updated {file_path}")
     
     print()
     print("=" * 60)